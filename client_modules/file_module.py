@@ -13,6 +13,7 @@ import threading
 import json
 import os
 from constants import PORTS, FILE_TRANSFER_CONFIG
+from wire import FILE_FRAME_HEADER as FRAME_HEADER
 
 class FileClient:
     def __init__(self, server_ip, username, file_list_callback, progress_callback):
@@ -55,6 +56,11 @@ class FileClient:
             print(f"[FILE] Connection error: {e}")
             return False
             
+    def _send_request(self, sock, request):
+        """Send a control request framed as a 4-byte big-endian length plus JSON"""
+        payload = json.dumps(request).encode('utf-8')
+        sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+            
     def _listen_updates(self):
         """Listen for file list updates from server"""
         while self.running and self.connected:
@@ -64,14 +70,14 @@ class FileClient:
                 
                 # First receive the length header (4 bytes)
                 length_data = b''
-                while len(length_data) < 4:
-                    chunk = self.socket.recv(4 - len(length_data))
+                while len(length_data) < FRAME_HEADER.size:
+                    chunk = self.socket.recv(FRAME_HEADER.size - len(length_data))
                     if not chunk:
                         print("[FILE] Connection closed by server")
                         return
                     length_data += chunk
                 
-                msg_length = int.from_bytes(length_data, 'big')
+                (msg_length,) = FRAME_HEADER.unpack(length_data)
                 
                 # Receive the actual message
                 data = b''
@@ -133,7 +139,7 @@ class FileClient:
                 'filesize': filesize,
                 'username': self.username
             }
-            upload_socket.send(json.dumps(request).encode('utf-8'))
+            self._send_request(upload_socket, request)
             
             # Wait for ready signal
             response = json.loads(upload_socket.recv(1024).decode('utf-8'))
@@ -201,7 +207,7 @@ class FileClient:
                 'command': 'DOWNLOAD',
                 'filename': filename
             }
-            download_socket.send(json.dumps(request).encode('utf-8'))
+            self._send_request(download_socket, request)
             print(f"[FILE] Sent download request for {filename}")
             
             # Receive file metadata
@@ -283,18 +289,18 @@ class FileClient:
             list_socket.connect((self.server_ip, PORTS['FILE_TRANSFER']))
             
             request = {'command': 'LIST'}
-            list_socket.send(json.dumps(request).encode('utf-8'))
+            self._send_request(list_socket, request)
             
             # Receive length header
             length_data = b''
-            while len(length_data) < 4:
-                chunk = list_socket.recv(4 - len(length_data))
+            while len(length_data) < FRAME_HEADER.size:
+                chunk = list_socket.recv(FRAME_HEADER.size - len(length_data))
                 if not chunk:
                     break
                 length_data += chunk
             
-            if len(length_data) == 4:
-                msg_length = int.from_bytes(length_data, 'big')
+            if len(length_data) == FRAME_HEADER.size:
+                (msg_length,) = FRAME_HEADER.unpack(length_data)
                 
                 # Receive the actual data
                 data = b''
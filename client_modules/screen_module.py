@@ -9,12 +9,16 @@ Task summary:
 
 import socket
 import threading
-import pickle
-import struct
 import cv2
 import numpy as np
 from mss import mss
-from constants import PORTS, SCREEN_SHARE_CONFIG, BUFFER_SIZE
+from constants import PORTS, SCREEN_SHARE_CONFIG
+from screen_protocol import (
+    MSG_SCREEN_FRAME, FRAME_HEADER, HDR,
+    encode_control as _encode_control, decode_control as _decode_control
+)
+from wire import send_buffers as _send_buffers
+
 
 class ScreenClient:
     def __init__(self, server_ip, username, on_screen_frame_callback, on_notification_callback):
@@ -125,10 +129,7 @@ class ScreenClient:
                     _, buffer = cv2.imencode('.jpg', frame, encode_param)
                     
                     # Send frame
-                    self._send_message({
-                        'type': 'screen_frame',
-                        'frame': buffer
-                    })
+                    self._send_frame(buffer)
                     
                     # Control frame rate
                     threading.Event().wait(frame_delay)
@@ -146,42 +147,43 @@ class ScreenClient:
     def _send_message(self, message):
         """Send message to server"""
         try:
-            data = pickle.dumps(message)
-            message_size = struct.pack("L", len(data))
-            self.socket.sendall(message_size + data)
+            self.socket.sendall(_encode_control(message))
+        except Exception as e:
+            print(f"[Screen] Send error: {e}")
+                
+    def _send_frame(self, buffer):
+        """Send an encoded frame as a binary message"""
+        try:
+            # Stamped with our own name so the server can relay the message untouched
+            name = self.username.encode('utf-8')
+            header = FRAME_HEADER.pack(MSG_SCREEN_FRAME, len(name), buffer.nbytes)
+            message_size = HDR.pack(FRAME_HEADER.size + len(name) + buffer.nbytes)
+            _send_buffers(self.socket, [message_size + header + name, buffer])
         except Exception as e:
             print(f"[Screen] Send error: {e}")
                 
     def _receive_messages(self):
         """Receive messages from server"""
-        data = b""
-        payload_size = struct.calcsize("L")
+        size_buffer = bytearray(HDR.size)
         
         while self.receiving:
             try:
                 # Receive message size
-                while len(data) < payload_size:
-                    packet = self.socket.recv(BUFFER_SIZE)
-                    if not packet:
-                        break
-                    data += packet
-                    
-                if len(data) < payload_size:
+                if not self._recv_exact_into(memoryview(size_buffer)):
                     break
-                    
-                packed_msg_size = data[:payload_size]
-                data = data[payload_size:]
-                msg_size = struct.unpack("L", packed_msg_size)[0]
+                msg_size, = HDR.unpack(size_buffer)
                 
-                # Receive message data
-                while len(data) < msg_size:
-                    data += self.socket.recv(BUFFER_SIZE)
-                    
-                message_data = data[:msg_size]
-                data = data[msg_size:]
+                # Receive message data straight into a buffer of its final size
+                message_data = bytearray(msg_size)
+                if not self._recv_exact_into(memoryview(message_data)):
+                    break
                 
-                # Unpack message
-                message = pickle.loads(message_data)
+                if message_data and message_data[0] == MSG_SCREEN_FRAME:
+                    self._handle_frame(message_data)
+                    continue
+                    
+                # Unpack control message
+                message = _decode_control(message_data)
                 
                 # Handle different message types
                 if message['type'] == 'presenting_allowed':
@@ -206,23 +208,34 @@ class ScreenClient:
                     presenter = message['username']
                     self.on_notification('stopped', presenter)
                     
-                elif message['type'] == 'screen_frame':
-                    # Received screen frame
-                    username = message['username']
-                    frame_buffer = message['frame']
-                    
-                    # Decode frame
-                    frame = cv2.imdecode(frame_buffer, cv2.IMREAD_COLOR)
-                    
-                    if frame is not None:
-                        self.on_screen_frame(username, frame)
-                    
             except Exception as e:
                 print(f"[Screen] Receive error: {e}")
                 break
                 
         self.receiving = False
         
+    def _recv_exact_into(self, view):
+        """Fill view completely from the socket; returns False if the server closed the connection"""
+        while len(view):
+            count = self.socket.recv_into(view)
+            if not count:
+                return False
+            view = view[count:]
+        return True
+        
+    def _handle_frame(self, message_data):
+        """Decode a binary screen frame and hand it to the viewer"""
+        _, name_length, frame_length = FRAME_HEADER.unpack_from(message_data)
+        start = FRAME_HEADER.size
+        username = message_data[start:start + name_length].decode('utf-8')
+        
+        # Decode frame straight from the message bytes
+        frame_buffer = np.frombuffer(message_data, np.uint8, count=frame_length, offset=start + name_length)
+        frame = cv2.imdecode(frame_buffer, cv2.IMREAD_COLOR)
+        
+        if frame is not None:
+            self.on_screen_frame(username, frame)
+        
     def disconnect(self):
         """Disconnect from server"""
         self.streaming = False
@@ -20,6 +20,9 @@ from constants import PORTS, VIDEO_CONFIG, BUFFER_SIZE
 
 FRAME_HEADER = "FRAME"
 REGISTER_HEADER = "REGISTER"
+# Datagram kinds differ in their first byte, which is all the receive loop compares
+FRAME_TAG = FRAME_HEADER.encode('utf-8')[0]
+REGISTER_TAG = REGISTER_HEADER.encode('utf-8')[0]
 MAX_DATAGRAM_SIZE = 8192
 RECV_BUFFER_SIZE = min(BUFFER_SIZE, 16384)
 KEEPALIVE_INTERVAL = 4
@@ -204,10 +207,10 @@ class VideoClient:
                     print(f"[VIDEO] Error receiving: {exc}")
                 continue
 
-            if not data or data.startswith(REGISTER_HEADER.encode('utf-8')):
+            if not data or data[0] == REGISTER_TAG:
                 continue
 
-            if data.startswith(FRAME_HEADER.encode('utf-8')):
+            if data[0] == FRAME_TAG:
                 self._handle_frame_chunk(data)
 
     def _handle_frame_chunk(self, packet):
@@ -54,6 +54,10 @@ SCREEN_SHARE_CONFIG = {
     'QUALITY': 70,
     'MAX_WIDTH': 1280,
     'MAX_HEIGHT': 720,
+    'SEND_BUFFER_SIZE': 2 * 1024 * 1024,  # SO_SNDBUF per viewer so a whole frame fits in the kernel
+    'MAX_QUEUED_MESSAGES': 30,  # Control messages waiting for one viewer before it is dropped as too slow
+    'MAX_QUEUED_FRAMES': 3,  # Frames waiting for one viewer; older ones are dropped for newer
+    'RECV_BUFFER_SIZE': 1024 * 1024,  # Per-client receive buffer; grows for a larger message
 }
 
 # File Transfer Configuration
@@ -61,12 +65,21 @@ FILE_TRANSFER_CONFIG = {
     'CHUNK_SIZE': 8192,
     'MAX_FILE_SIZE': 500 * 1024 * 1024,  # 500 MB
     'STORAGE_PATH': './shared_files/',
+    'MMAP_MAX_SIZE': 64 * 1024 * 1024,  # Files up to this size stay memory-mapped for downloads
+    'SOCKET_BUFFER_SIZE': 4 * 1024 * 1024,  # SO_SNDBUF/SO_RCVBUF for file transfer sockets
+    # Client requests (UPLOAD/DOWNLOAD/LIST) are framed as a 4-byte big-endian
+    # length followed by that many bytes of UTF-8 JSON
+    'CONTROL_MAX_SIZE': 64 * 1024,
+    'DIRECT_IO_THRESHOLD': 16 * 1024 * 1024,  # Uploads this large are written with O_DIRECT (Linux)
+    'MAX_CONN': 128,  # Worker threads serving uploads/downloads
+    'MAX_PENDING_TRANSFERS': 256,  # Running + queued transfers before new ones are refused
 }
 
 # Chat Configuration
 CHAT_CONFIG = {
     'MAX_MESSAGE_LENGTH': 4096,
     'MESSAGE_ENCODING': 'utf-8',
+    'SEND_BUFFER_SIZE': 256 * 1024,  # SO_SNDBUF for each chat client socket
 }
 
 # UI Configuration
@@ -83,4 +96,5 @@ CONNECTION_CONFIG = {
     'TIMEOUT': 30,
     'RECONNECT_ATTEMPTS': 3,
     'HEARTBEAT_INTERVAL': 5,
+    'MAX_PARTICIPANTS': 64,  # Participant connections served at once
 }
\ No newline at end of file
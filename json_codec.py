@@ -0,0 +1,22 @@
+# json_codec.py
+"""JSON encoding shared by the server modules.
+
+orjson is an optional speedup: it encodes straight to bytes and parses bytes
+without a separate decode step. Without it the stdlib json module is used with
+the same contract: dumps() returns UTF-8 bytes and loads() accepts any
+bytes-like object.
+"""
+
+import json
+
+try:
+    import orjson
+
+    dumps = orjson.dumps
+    loads = orjson.loads
+except ImportError:
+    def dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
+    def loads(data):
+        return json.loads(bytes(data).decode('utf-8'))
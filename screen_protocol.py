@@ -0,0 +1,55 @@
+# screen_protocol.py
+"""Screen share wire protocol shared by the client and server screen modules.
+
+Every message is HDR (a length prefix) followed by a body. Screen frame bodies
+are FRAME_HEADER, the presenter's UTF-8 username and the raw JPEG bytes.
+Control bodies are CONTROL_HEADER followed by at most one UTF-8 username; their
+type codes never collide with MSG_SCREEN_FRAME.
+"""
+
+import functools
+import struct
+
+MSG_SCREEN_FRAME = 0x01
+FRAME_HEADER = struct.Struct("!BHI")  # (message type, username length, frame length)
+HDR = struct.Struct("!I")  # Outer length prefix in front of every message, same on every platform
+
+CONTROL_TYPES = {
+    0x10: 'start_presenting',
+    0x11: 'stop_presenting',
+    0x12: 'presenter_started',
+    0x13: 'presenter_stopped',
+    0x14: 'presenting_allowed',
+}
+CONTROL_CODES = {name: code for code, name in CONTROL_TYPES.items()}
+CONTROL_HEADER = struct.Struct("!B?H")  # (message type, allowed flag, username length)
+
+
+def encode_control(message):
+    """Encode a control message dict as one length-prefixed wire message"""
+    return _encode_control_fields(
+        message['type'],
+        bool(message.get('allowed', False)),
+        message.get('username') or message.get('current_presenter') or ''
+    )
+
+
+@functools.lru_cache(maxsize=128)
+def _encode_control_fields(message_type, allowed, username):
+    """Cached encoder: presenter notifications repeat for every viewer that joins"""
+    name = username.encode('utf-8')
+    header = CONTROL_HEADER.pack(CONTROL_CODES[message_type], allowed, len(name))
+    return HDR.pack(len(header) + len(name)) + header + name
+
+
+def decode_control(data):
+    """Rebuild a control message dict from a received message body"""
+    code, allowed, name_length = CONTROL_HEADER.unpack_from(data)
+    message_type = CONTROL_TYPES[code]
+    name = bytes(data[CONTROL_HEADER.size:CONTROL_HEADER.size + name_length]).decode('utf-8')
+    if message_type != 'presenting_allowed':
+        return {'type': message_type, 'username': name}
+    message = {'type': message_type, 'allowed': allowed}
+    if name:
+        message['current_presenter'] = name
+    return message
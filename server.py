@@ -6,11 +6,12 @@ Task summary:
 - Handle safe startup, shutdown, and rollback so dependent modules never remain in a half-started state.
 """
 
+import functools
 import socket
 import sys
 import threading
 import time
-from queue import Queue
+from collections import deque
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
@@ -22,6 +23,10 @@ from server_modules.audio_module import AudioServer
 from server_modules.screen_module import ScreenServer
 from server_modules.participant_module import ParticipantServer
 
+LOG_QUEUE_LIMIT = 10_000  # Pending log entries kept before the oldest are dropped
+LOG_MAX_LINES = 5000      # Lines retained in the console widget
+LOG_TRIM_LINES = 1000     # Lines removed at once when the widget overflows
+
 
 class MainServer:
     """Coordinates startup and shutdown of all server modules."""
@@ -156,8 +161,9 @@ class MainServer:
         self.stop_modules()
 
 
+@functools.lru_cache(maxsize=1)
 def get_local_ips():
-    """Return the primary IPv4 address for the current host."""
+    """Return the primary IPv4 address for the current host (probed once, then cached)."""
     primary_ip = "127.0.0.1"
 
     try:
@@ -177,7 +183,7 @@ def get_local_ips():
         except Exception:
             pass
 
-    return [primary_ip]
+    return (primary_ip,)
 
 
 class StreamRedirect:
@@ -212,8 +218,10 @@ class ServerGUI:
         self.server.set_log_callback(self.enqueue_log)
         self.server.set_status_callback(self.handle_status_update)
 
-        self.log_queue = Queue()
+        self.log_queue = deque(maxlen=LOG_QUEUE_LIMIT)
         self.status_labels = {}
+        self._pending_status = {}
+        self._status_lock = threading.Lock()
         self.original_stdout = sys.stdout
         self.original_stderr = sys.stderr
         self.stdout_redirect = None
@@ -260,17 +268,16 @@ class ServerGUI:
             fg="#CCCCCC",
         ).pack(anchor="w")
 
-        ips = get_local_ips()
-        ip_text = f"Current IP: {ips[0]}"
         self.ip_label = tk.Label(
             ip_frame,
-            text=ip_text,
+            text="Current IP: detecting...",
             font=("Consolas", 11),
             bg="#000000",
             fg="#FFFFFF",
             justify=tk.LEFT,
         )
         self.ip_label.pack(anchor="w", pady=(4, 0))
+        self._probe_ip_async()
 
         control_frame = tk.Frame(self.root, bg="#000000")
         control_frame.pack(fill=tk.X, padx=20, pady=(5, 15))
@@ -368,6 +375,15 @@ class ServerGUI:
         self.log_text.pack(fill=tk.BOTH, expand=True)
         self.log_text.config(state=tk.DISABLED)
 
+    def _probe_ip_async(self):
+        """Resolve the local IP on a background thread so launch never blocks on DNS."""
+
+        def worker():
+            ips = get_local_ips()
+            self.root.after(0, lambda: self.ip_label.config(text=f"Current IP: {ips[0]}"))
+
+        threading.Thread(target=worker, daemon=True).start()
+
     def _redirect_streams(self):
         """Pipe stdout/stderr into the GUI while preserving terminal output."""
         self.stdout_redirect = StreamRedirect(self.enqueue_log, self.original_stdout)
@@ -376,22 +392,46 @@ class ServerGUI:
         sys.stderr = self.stderr_redirect
 
     def enqueue_log(self, message):
-        """Queue a log message for the text widget."""
-        self.log_queue.put(message)
+        """Queue a log message for the text widget (oldest entries drop on overflow)."""
+        self.log_queue.append(message)
 
     def poll_log_queue(self):
         """Drain the log queue and append entries into the scrolled text."""
-        while not self.log_queue.empty():
-            message = self.log_queue.get()
+        messages = []
+        while self.log_queue:
+            try:
+                messages.append(self.log_queue.popleft())
+            except IndexError:
+                break
+
+        if messages:
             self.log_text.config(state=tk.NORMAL)
-            self.log_text.insert(tk.END, message)
+            self.log_text.insert(tk.END, "".join(messages))
+
+            # Keep the widget bounded so long sessions do not grow memory forever
+            line_count = int(self.log_text.index("end-1c").split(".")[0])
+            if line_count > LOG_MAX_LINES:
+                self.log_text.delete("1.0", f"{LOG_TRIM_LINES + 1}.0")
+
             self.log_text.config(state=tk.DISABLED)
             self.log_text.see(tk.END)
         self.root.after(100, self.poll_log_queue)
 
     def handle_status_update(self, name, status):
-        """Schedule a thread-safe status update for the UI."""
-        self.root.after(0, self._apply_status_update, name, status)
+        """Record a status change and schedule at most one UI flush for the batch."""
+        with self._status_lock:
+            schedule = not self._pending_status
+            self._pending_status[name] = status
+        if schedule:
+            self.root.after(0, self._flush_status_updates)
+
+    def _flush_status_updates(self):
+        """Apply the latest pending status of every module in a single Tk callback."""
+        with self._status_lock:
+            pending = self._pending_status
+            self._pending_status = {}
+        for name, status in pending.items():
+            self._apply_status_update(name, status)
 
     def _apply_status_update(self, name, status):
         """Update the status badge for a specific module."""
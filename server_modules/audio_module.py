@@ -10,14 +10,25 @@ Task summary:
 import socket
 import threading
 import time
+from collections import deque
 
 import numpy as np
 
-from constants import PORTS, HOST, BUFFER_SIZE
+from constants import PORTS, HOST, BUFFER_SIZE, AUDIO_CONFIG
 
 REGISTER_PREFIX = b"REGISTER|"
 RECV_BUFFER_SIZE = min(BUFFER_SIZE, 65535)
 CLIENT_TIMEOUT = 12
+MIX_QUEUE_DEPTH = 4  # Pending mix requests; older ones are dropped when the worker lags
+
+# Every client captures fixed-size int16 chunks, so the mixer works on one known shape
+FRAME_SAMPLES = AUDIO_CONFIG['CHUNK_SIZE'] * AUDIO_CONFIG['CHANNELS']
+FRAME_BYTES = FRAME_SAMPLES * 2
+
+# Soft limiter: samples under the knee pass unchanged, louder ones bend smoothly
+# towards full scale (slope 1 at the knee, so there is no audible corner)
+LIMITER_KNEE = 24576.0  # 0.75 of int16 full scale
+LIMITER_RANGE = 32767.0 - LIMITER_KNEE
 
 
 class AudioServer:
@@ -25,6 +36,10 @@ class AudioServer:
         self.clients = {}  # {address: username}
         self.last_seen = {}
         self.latest_chunks = {}
+        self._mix_queue = deque(maxlen=MIX_QUEUE_DEPTH)
+        self._mix_ready = threading.Event()
+        self._mix = np.empty(FRAME_SAMPLES, dtype=np.float32)
+        self._out_i16 = np.empty(FRAME_SAMPLES, dtype=np.int16)
         self.running = False
         self.server_socket = None
 
@@ -39,10 +54,11 @@ class AudioServer:
         print(f"[AUDIO] Server started on {HOST}:{PORTS['AUDIO']}")
 
         threading.Thread(target=self._receive_and_broadcast, daemon=True).start()
+        threading.Thread(target=self._mix_loop, daemon=True).start()
         threading.Thread(target=self._cleanup_loop, daemon=True).start()
 
     def _receive_and_broadcast(self):
-        """Accept incoming audio chunks, register clients, and fan out mixed audio."""
+        """Accept incoming audio chunks, register clients, and queue mix requests."""
         while self.running:
             try:
                 data, address = self.server_socket.recvfrom(RECV_BUFFER_SIZE)
@@ -72,24 +88,49 @@ class AudioServer:
                 continue
 
             self.last_seen[address] = time.time()
+
+            if len(data) != FRAME_BYTES:
+                continue
+
             self.latest_chunks[address] = data
 
-            disconnected = []
-            for client_address in list(self.clients.keys()):
-                if client_address == address:
-                    continue
+            # Mixing and fan-out happen on the worker so a slow listener never
+            # stalls the receive queue
+            self._mix_queue.append(address)
+            self._mix_ready.set()
+
+    def _mix_loop(self):
+        """Drain mix requests and send each listener its blended stream."""
+        while self.running:
+            if not self._mix_ready.wait(1.0):
+                continue
+            self._mix_ready.clear()
+
+            while self._mix_queue:
                 try:
-                    mix_bytes = self._build_mix_for_target(client_address)
-                    if mix_bytes:
-                        self.server_socket.sendto(mix_bytes, client_address)
-                except Exception as exc:
-                    print(f"[AUDIO] Error sending to {client_address}: {exc}")
-                    disconnected.append(client_address)
-
-            for dead in disconnected:
-                self.clients.pop(dead, None)
-                self.last_seen.pop(dead, None)
-                self.latest_chunks.pop(dead, None)
+                    sender = self._mix_queue.popleft()
+                except IndexError:
+                    break
+                self._fan_out(sender)
+
+    def _fan_out(self, sender):
+        """Send a fresh mix to every client except the one whose chunk triggered it."""
+        disconnected = []
+        for client_address in list(self.clients.keys()):
+            if client_address == sender:
+                continue
+            try:
+                mix_bytes = self._build_mix_for_target(client_address)
+                if mix_bytes:
+                    # Mixes leave from the bound audio port the client sent to, so
+                    # stateful firewalls on the client side see them as replies
+                    self.server_socket.sendto(mix_bytes, client_address)
+            except Exception as exc:
+                print(f"[AUDIO] Error sending to {client_address}: {exc}")
+                disconnected.append(client_address)
+
+        for dead in disconnected:
+            self._drop_client(dead)
 
     def _cleanup_loop(self):
         """Periodically expire clients that stopped sending keepalives."""
@@ -98,58 +139,55 @@ class AudioServer:
             now = time.time()
             stale = [addr for addr, last in self.last_seen.items() if now - last > CLIENT_TIMEOUT]
             for addr in stale:
-                username = self.clients.pop(addr, None)
-                self.last_seen.pop(addr, None)
-                self.latest_chunks.pop(addr, None)
+                username = self._drop_client(addr)
                 if username:
                     print(f"[AUDIO] Removed stale audio client: {username} {addr}")
 
-    def _build_mix_for_target(self, target_address):
-        """Blend the freshest PCM chunks from everyone except the target client."""
-        contributors = [
-            chunk for addr, chunk in self.latest_chunks.items()
-            if addr != target_address and chunk
-        ]
-
-        if not contributors:
-            return None
+    def _drop_client(self, address):
+        """Forget every piece of state kept for a client and return its username."""
+        username = self.clients.pop(address, None)
+        self.last_seen.pop(address, None)
+        self.latest_chunks.pop(address, None)
+        return username
 
-        arrays = []
-        min_length = None
+    def _build_mix_for_target(self, target_address):
+        """Blend the freshest PCM frames from everyone except the target client."""
+        mixed = self._mix
+        contributors = 0
 
-        for chunk in contributors:
-            if len(chunk) < 2:
-                continue
-            try:
-                pcm = np.frombuffer(chunk, dtype=np.int16)
-                if min_length is None or pcm.size < min_length:
-                    min_length = pcm.size
-                arrays.append(pcm)
-            except Exception:
+        for addr, chunk in list(self.latest_chunks.items()):
+            if addr == target_address or not chunk:
                 continue
+            pcm = np.frombuffer(chunk, dtype=np.int16)
+            if contributors == 0:
+                np.copyto(mixed, pcm)
+            else:
+                np.add(mixed, pcm, out=mixed)
+            contributors += 1
 
-        if not arrays or min_length is None or min_length == 0:
+        if not contributors:
             return None
 
-        # Trim all arrays to same length
-        arrays = [pcm[:min_length] for pcm in arrays]
-        
-        # Mix with proper normalization to prevent clipping
-        mixed = np.sum(arrays, axis=0, dtype=np.float32)
-        
         # Normalize by number of contributors with headroom
-        mixed = mixed / max(len(arrays), 1)
-        
-        # Soft limiting to prevent harsh clipping
-        mixed = np.tanh(mixed / 32768.0) * 32767.0
-        
-        # Convert back to int16
-        np.clip(mixed, -32768, 32767, out=mixed)
-        return mixed.astype(np.int16).tobytes()
+        mixed /= contributors
+
+        # Soft limiting to prevent harsh clipping, decided per sample so one loud
+        # sample never changes the gain of the rest of the frame
+        excess = np.abs(mixed) - LIMITER_KNEE
+        loud = excess > 0
+        if loud.any():
+            squeezed = LIMITER_KNEE + LIMITER_RANGE * np.tanh(excess[loud] / LIMITER_RANGE)
+            mixed[loud] = np.copysign(squeezed, mixed[loud])
+
+        # Convert back to int16 into the reusable output buffer and hand the
+        # socket a view of it, avoiding an intermediate bytes copy per listener
+        np.copyto(self._out_i16, mixed, casting='unsafe')
+        return memoryview(self._out_i16).cast('B')
 
     def stop(self):
         """Stop the audio server"""
         self.running = False
+        self._mix_ready.set()
         if self.server_socket:
             self.server_socket.close()
         print("[AUDIO] Server stopped")
\ No newline at end of file
@@ -10,9 +10,14 @@ Task summary:
 
 import socket
 import threading
-import json
 from datetime import datetime
 from constants import PORTS, HOST, CHAT_CONFIG
+from json_codec import dumps as _dumps, loads as _loads
+
+# Fixed-layout join/leave notices, filled with a pre-escaped username and timestamp
+SYS_JOIN = b'{"type":"system","username":"System","message":"%s joined the chat","timestamp":"%s"}'
+SYS_LEAVE = b'{"type":"system","username":"System","message":"%s left the chat","timestamp":"%s"}'
+
 
 class ChatServer:
     def __init__(self):
@@ -40,6 +45,7 @@ class ChatServer:
             try:
                 client_socket, address = self.server_socket.accept()
                 print(f"[CHAT] New connection from {address}")
+                self._tune_client_socket(client_socket)
                 
                 # Handle client in separate thread
                 client_thread = threading.Thread(
@@ -52,24 +58,33 @@ class ChatServer:
                 if self.running:
                     print(f"[CHAT] Error accepting client: {e}")
                     
+    def _tune_client_socket(self, client_socket):
+        """Disable Nagle and enlarge the send buffer for low-latency chat delivery"""
+        try:
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client_socket.setsockopt(
+                socket.SOL_SOCKET, socket.SO_SNDBUF, CHAT_CONFIG['SEND_BUFFER_SIZE']
+            )
+            if hasattr(socket, 'TCP_QUICKACK'):
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        except OSError as e:
+            print(f"[CHAT] Could not tune client socket: {e}")
+                    
     def _handle_client(self, client_socket):
         """Handle messages from a single client"""
         username = None
+        escaped_name = None
         
         try:
             # Receive username first
             data = client_socket.recv(1024).decode(CHAT_CONFIG['MESSAGE_ENCODING'])
             username = data
+            # JSON-escape the name once; it is reused for the leave notice
+            escaped_name = _dumps(username)[1:-1]
             self.clients[client_socket] = username
             
             # Broadcast join message
-            join_msg = {
-                'type': 'system',
-                'username': 'System',
-                'message': f'{username} joined the chat',
-                'timestamp': datetime.now().strftime('%H:%M:%S')
-            }
-            self._broadcast(json.dumps(join_msg), None)
+            self._broadcast(self._system_message(SYS_JOIN, escaped_name), None)
             
             # Handle messages
             while self.running:
@@ -77,39 +92,37 @@ class ChatServer:
                 if not data:
                     break
                     
-                message_data = json.loads(data.decode(CHAT_CONFIG['MESSAGE_ENCODING']))
+                message_data = _loads(data)
                 message_data['timestamp'] = datetime.now().strftime('%H:%M:%S')
                 
                 # Broadcast to all clients
-                self._broadcast(json.dumps(message_data), client_socket)
+                self._broadcast(_dumps(message_data), client_socket)
                 
         except Exception as e:
             print(f"[CHAT] Error handling client {username}: {e}")
         finally:
             # Client disconnected
             if client_socket in self.clients:
-                username = self.clients[client_socket]
                 del self.clients[client_socket]
                 
                 # Broadcast leave message
-                leave_msg = {
-                    'type': 'system',
-                    'username': 'System',
-                    'message': f'{username} left the chat',
-                    'timestamp': datetime.now().strftime('%H:%M:%S')
-                }
-                self._broadcast(json.dumps(leave_msg), None)
+                self._broadcast(self._system_message(SYS_LEAVE, escaped_name), None)
                 
             client_socket.close()
             
+    def _system_message(self, template, escaped_name):
+        """Fill a join/leave template without going through the JSON encoder"""
+        timestamp = datetime.now().strftime('%H:%M:%S').encode('ascii')
+        return template % (escaped_name, timestamp)
+            
     def _broadcast(self, message, exclude_socket=None):
-        """Broadcast message to all connected clients"""
+        """Broadcast an already-encoded message to all connected clients"""
         disconnected = []
         
         for client_socket in self.clients:
             if client_socket != exclude_socket:
                 try:
-                    client_socket.send(message.encode(CHAT_CONFIG['MESSAGE_ENCODING']))
+                    client_socket.send(message)
                 except:
                     disconnected.append(client_socket)
                     
@@ -10,16 +10,73 @@ Task summary:
 
 import socket
 import threading
-import json
+import hashlib
+import mmap
 import os
-from constants import PORTS, HOST, FILE_TRANSFER_CONFIG
+import selectors
+import struct
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from constants import PORTS, HOST, FILE_TRANSFER_CONFIG, CONNECTION_CONFIG
+from json_codec import dumps as _dumps, loads as _loads
+from wire import FILE_FRAME_HEADER as FRAME_HEADER, send_buffers as _send_buffers
+
+UPLOAD_BUFFER_SIZE = 1 << 20  # Reused receive buffer for uploads (1 MiB)
+DIRECT_IO_BUFFER_SIZE = 4 << 20  # Page-aligned staging buffer for O_DIRECT uploads (4 MiB)
+DIRECT_IO_ALIGNMENT = 4096  # O_DIRECT writes must be multiples of the logical block size
+BROADCAST_DEBOUNCE = 0.05  # Seconds to gather further uploads into one file list broadcast
+# Windows refuses to replace a file that has an open mapping (ERROR_USER_MAPPED_FILE),
+# which would make re-uploads fail while the file is being downloaded; serve from disk there
+MMAP_CACHE_ENABLED = os.name != 'nt'
+
+
+def _file_sha256(filepath):
+    """Hex SHA-256 of a file, via hashlib.file_digest where available (Python 3.11+)"""
+    with open(filepath, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        digest = hashlib.sha256()
+        for block in iter(lambda: f.read(UPLOAD_BUFFER_SIZE), b''):
+            digest.update(block)
+        return digest.hexdigest()
+
+
+def _fadvise(fd, advice):
+    """Tell the page cache how a whole file will be used (POSIX only; a no-op elsewhere)"""
+    if hasattr(os, 'posix_fadvise') and hasattr(os, advice):
+        try:
+            os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+        except OSError:
+            pass
+
+
+def _write_all(fd, view):
+    """os.write() until the whole view is on disk; a write that makes no progress raises"""
+    while view:
+        written = os.write(fd, view)
+        if written <= 0:
+            raise OSError(f"write stalled with {len(view)} bytes left")
+        view = view[written:]
+
 
 class FileServer:
     def __init__(self):
-        self.clients = []  # List of connected client sockets
+        # {socket: {'addr': address, 'buffer': request buffer view, 'filled': bytes in it,
+        #           'busy': True while a transfer owns the socket, 'list_queued': LIST reply pending,
+        #           'lock': guards busy and writes}}
+        self.clients = {}
         self.running = False
         self.server_socket = None
-        self.available_files = {}  # {filename: {'size': size, 'uploader': username}}
+        self._selector = None
+        self._pool = None  # Worker threads for uploads and downloads
+        self._transfer_slots = None  # Bounds running plus queued transfers
+        self.available_files = {}  # {filename: {'size': size, 'uploader': username, 'sha256': hex digest or None}}
+        self._mappings = {}  # {filename: read-only mmap of the stored file}
+        self._file_list_frame = None  # (length header, payload) of the file list, rebuilt after changes
+        self._file_list_lock = threading.Lock()
+        self._store_lock = threading.Lock()  # Keeps each file swap and its catalogue entry together
+        self._broadcast_pending = None  # Set when the file list changed and clients need the update
         self.storage_path = FILE_TRANSFER_CONFIG['STORAGE_PATH']
         
         # Create storage directory if it doesn't exist
@@ -33,12 +90,16 @@ class FileServer:
         try:
             for filename in os.listdir(self.storage_path):
                 filepath = os.path.join(self.storage_path, filename)
+                if filename.endswith('.part'):
+                    continue  # Leftover from an interrupted upload
                 if os.path.isfile(filepath):
                     filesize = os.path.getsize(filepath)
                     self.available_files[filename] = {
                         'size': filesize,
-                        'uploader': 'Server'  # Mark as uploaded by server (existing file)
+                        'uploader': 'Server',  # Mark as uploaded by server (existing file)
+                        'sha256': None  # Filled in by the checksum thread started in start()
                     }
+                    self._map_file(filename)
             
             if self.available_files:
                 print(f"[FILE] Loaded {len(self.available_files)} existing files from storage")
@@ -49,6 +110,45 @@ class FileServer:
         except Exception as e:
             print(f"[FILE] Error loading existing files: {e}")
         
+    def _map_file(self, filename):
+        """Keep a read-only mapping of a stored file so downloads skip read() calls"""
+        if not MMAP_CACHE_ENABLED:
+            return
+        filepath = os.path.join(self.storage_path, filename)
+        try:
+            filesize = os.path.getsize(filepath)
+            # Empty files cannot be mapped; very large ones would pressure the address space
+            if filesize == 0 or filesize > FILE_TRANSFER_CONFIG['MMAP_MAX_SIZE']:
+                return
+            with open(filepath, 'rb') as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(mapping, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mapping.madvise(mmap.MADV_SEQUENTIAL)
+        except (OSError, ValueError) as e:
+            print(f"[FILE] Could not map {filename}: {e}")
+            return
+        self._unmap_file(filename)
+        self._mappings[filename] = mapping
+        
+    def _unmap_file(self, filename):
+        """Drop the cached mapping for a file, if any"""
+        mapping = self._mappings.pop(filename, None)
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                pass  # A download still holds a view; the mapping is freed when it finishes
+                
+    def _mapped_view(self, filename):
+        """Return a memoryview over the cached mapping, or None if the file is not mapped"""
+        mapping = self._mappings.get(filename)
+        if mapping is None:
+            return None
+        try:
+            return memoryview(mapping)
+        except ValueError:
+            return None  # Closed by a concurrent re-upload
+        
     def start(self):
         """Start the file transfer server"""
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -59,56 +159,189 @@ class FileServer:
         
         print(f"[FILE] Server started on {HOST}:{PORTS['FILE_TRANSFER']}")
         
-        # Start accepting clients
-        accept_thread = threading.Thread(target=self._accept_clients, daemon=True)
-        accept_thread.start()
+        # One event loop multiplexes accepts and control reads for every connection;
+        # only uploads and downloads get a thread of their own
+        self._pool = ThreadPoolExecutor(
+            max_workers=FILE_TRANSFER_CONFIG['MAX_CONN'],
+            thread_name_prefix='fileworker'
+        )
+        self._transfer_slots = threading.BoundedSemaphore(FILE_TRANSFER_CONFIG['MAX_PENDING_TRANSFERS'])
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.server_socket, selectors.EVENT_READ)
+        loop_thread = threading.Thread(target=self._event_loop, args=(self._selector,), daemon=True)
+        loop_thread.start()
+        
+        self._broadcast_pending = threading.Event()
+        broadcast_thread = threading.Thread(
+            target=self._broadcast_loop,
+            args=(self._broadcast_pending,),
+            daemon=True
+        )
+        broadcast_thread.start()
+        # Checksum the files loaded from storage off both start() and the broadcast path
+        threading.Thread(target=self._fill_checksums, daemon=True).start()
         
-    def _accept_clients(self):
-        """Accept incoming file transfer connections"""
-        while self.running:
+    def _event_loop(self, selector):
+        """Dispatch readiness events for the listening socket and idle client connections"""
+        # A restart installs a new selector; the previous loop then winds down
+        while self.running and self._selector is selector:
             try:
-                client_socket, address = self.server_socket.accept()
-                print(f"[FILE] New connection from {address}")
-                self.clients.append(client_socket)
-                
-                # Handle client in separate thread
-                client_thread = threading.Thread(
-                    target=self._handle_client,
-                    args=(client_socket,),
-                    daemon=True
-                )
-                client_thread.start()
-            except Exception as e:
-                if self.running:
-                    print(f"[FILE] Error accepting client: {e}")
+                events = selector.select(timeout=1.0)
+            except (OSError, ValueError):
+                break
+            for key, _ in events:
+                if key.fileobj is self.server_socket:
+                    self._accept_client()
+                    continue
+                try:
+                    self._read_requests(key.fileobj, key.data)
+                except Exception as e:
+                    print(f"[FILE] Error handling client: {e}")
+                    self._close_client(key.fileobj, abort=True)
+        selector.close()
                     
-    def _handle_client(self, client_socket):
-        """Handle file transfer requests from a client"""
+    def _accept_client(self):
+        """Accept an incoming file transfer connection and watch it for requests"""
         try:
-            while self.running:
-                data = client_socket.recv(1024).decode('utf-8')
-                if not data:
-                    break
+            client_socket, address = self.server_socket.accept()
+        except OSError as e:
+            if self.running:
+                print(f"[FILE] Error accepting client: {e}")
+            return
+        print(f"[FILE] New connection from {address}")
+        self._tune_client_socket(client_socket)
+        # A stalled peer must not pin a worker thread forever
+        client_socket.settimeout(CONNECTION_CONFIG['TIMEOUT'])
+        # Persistent per-connection buffer for length-prefixed control requests
+        buffer = memoryview(bytearray(FRAME_HEADER.size + FILE_TRANSFER_CONFIG['CONTROL_MAX_SIZE']))
+        state = {
+            'addr': address,
+            'buffer': buffer,
+            'filled': 0,
+            'busy': False,
+            'list_queued': False,
+            'lock': threading.Lock()
+        }
+        self.clients[client_socket] = state
+        self._selector.register(client_socket, selectors.EVENT_READ, state)
+        
+    def _tune_client_socket(self, client_socket):
+        """Disable Nagle for control replies and enlarge buffers for bulk transfers"""
+        buffer_size = FILE_TRANSFER_CONFIG['SOCKET_BUFFER_SIZE']
+        try:
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, buffer_size)
+            client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, buffer_size)
+        except OSError as e:
+            print(f"[FILE] Could not tune client socket: {e}")
+            
+    def _set_cork(self, client_socket, enabled):
+        """Toggle TCP_CORK (Linux) so bulk data leaves in full-sized segments"""
+        if hasattr(socket, 'TCP_CORK'):
+            try:
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 1 if enabled else 0)
+            except OSError:
+                pass
                     
-                request = json.loads(data)
-                command = request.get('command')
-                
-                if command == 'UPLOAD':
-                    self._handle_upload(client_socket, request)
-                elif command == 'DOWNLOAD':
-                    self._handle_download(client_socket, request)
-                elif command == 'LIST':
-                    self._send_file_list(client_socket)
+    def _read_requests(self, client_socket, state):
+        """Read what is available on a readable connection and dispatch complete requests"""
+        buffer = state['buffer']
+        filled = state['filled']
+        count = client_socket.recv_into(buffer[filled:])
+        if not count:
+            self._close_client(client_socket)
+            return
+        filled += count
+        state['filled'] = filled
+        # Quick ACK mode lapses after a while, so re-arm it after every control read
+        if hasattr(socket, 'TCP_QUICKACK'):
+            try:
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+            except OSError:
+                pass
+            
+        while filled >= FRAME_HEADER.size:
+            (length,) = FRAME_HEADER.unpack_from(buffer)
+            if length > FILE_TRANSFER_CONFIG['CONTROL_MAX_SIZE']:
+                print(f"[FILE] Control request too large ({length} bytes), closing connection")
+                self._close_client(client_socket, abort=True)
+                return
+            end = FRAME_HEADER.size + length
+            if filled < end:
+                break
+                
+            request = _loads(buffer[FRAME_HEADER.size:end])
+            # Requests are small, so moving what follows to the front is cheap
+            buffer[:filled - end] = buffer[end:filled]
+            filled -= end
+            state['filled'] = filled
+            command = request.get('command')
+            
+            if command in ('UPLOAD', 'DOWNLOAD'):
+                # Bulk transfers block, so hand the socket to a worker until it is done
+                self._selector.unregister(client_socket)
+                if not self._transfer_slots.acquire(blocking=False):
+                    print("[FILE] Transfer queue full, rejecting connection")
+                    self._close_client(client_socket)
+                    return
+                # File list broadcasts must not land in the middle of the transfer handshake
+                with state['lock']:
+                    state['busy'] = True
+                self._pool.submit(self._run_transfer, client_socket, request, state)
+                return
+            elif command == 'LIST':
+                # Replies go out from a worker so a peer that stops reading cannot stall
+                # the event loop; one queued reply is enough, as it carries the latest list
+                if not state['list_queued']:
+                    state['list_queued'] = True
+                    self._pool.submit(self._reply_file_list, client_socket, state)
                     
-        except Exception as e:
-            print(f"[FILE] Error handling client: {e}")
+    def _reply_file_list(self, client_socket, state):
+        """Answer a LIST request on a worker thread"""
+        state['list_queued'] = False  # Requests arriving from here on need a fresh reply
+        with state['lock']:
+            self._send_file_list(client_socket)
+            
+
+    def _run_transfer(self, client_socket, request, state):
+        """Run an upload or download, then return the connection to the event loop"""
+        slots = self._transfer_slots  # Release to the semaphore this transfer was admitted by
+        try:
+            if request.get('command') == 'UPLOAD':
+                self._handle_upload(client_socket, request)
+            else:
+                self._handle_download(client_socket, request)
         finally:
-            if client_socket in self.clients:
-                self.clients.remove(client_socket)
-            client_socket.close()
+            slots.release()
+            with state['lock']:
+                state['busy'] = False
+                
+        try:
+            if self.running:
+                self._selector.register(client_socket, selectors.EVENT_READ, state)
+                return
+        except (OSError, ValueError, KeyError):
+            pass
+        self._close_client(client_socket)
+        
+    def _close_client(self, client_socket, abort=False):
+        """Stop watching a connection and release it; abort resets it instead of a graceful close"""
+        try:
+            self._selector.unregister(client_socket)
+        except (KeyError, ValueError, OSError):
+            pass
+        self.clients.pop(client_socket, None)
+        if abort:
+            # Zero linger sends RST, so protocol violators leave no TIME_WAIT entry behind
+            try:
+                client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            except OSError:
+                pass
+        client_socket.close()
             
     def _handle_upload(self, client_socket, request):
         """Receive file from client and store it"""
+        partial_path = None
         try:
             filename = request['filename']
             filesize = request['filesize']
@@ -119,51 +352,137 @@ class FileServer:
             # Check file size limit
             if filesize > FILE_TRANSFER_CONFIG['MAX_FILE_SIZE']:
                 response = {'status': 'error', 'message': 'File too large'}
-                client_socket.send(json.dumps(response).encode('utf-8'))
+                client_socket.send(_dumps(response))
                 return
                 
             # Send ready signal
             response = {'status': 'ready'}
-            client_socket.send(json.dumps(response).encode('utf-8'))
+            client_socket.send(_dumps(response))
             
-            # Receive file data
+            # Receive file data into a temporary name and swap it in afterwards, so
+            # downloads still reading the previous version's mapping are unaffected.
+            # The name is unique, so concurrent uploads of one file never share it
             filepath = os.path.join(self.storage_path, filename)
-            received = 0
-            
-            with open(filepath, 'wb') as f:
-                while received < filesize:
-                    chunk = client_socket.recv(
-                        min(FILE_TRANSFER_CONFIG['CHUNK_SIZE'], filesize - received)
-                    )
-                    if not chunk:
-                        break
-                    f.write(chunk)
-                    received += len(chunk)
-                    
+            fd, partial_path = tempfile.mkstemp(dir=self.storage_path, prefix=filename + '.', suffix='.part')
+            os.close(fd)
+            os.chmod(partial_path, 0o644)  # mkstemp creates files readable by the owner only
+            # Hash chunks as they arrive, while they are still in memory
+            digest = hashlib.sha256()
+            received = None
+            if filesize >= FILE_TRANSFER_CONFIG['DIRECT_IO_THRESHOLD']:
+                received = self._receive_direct(client_socket, partial_path, filesize, digest)
+            if received is None:
+                received = self._receive_buffered(client_socket, partial_path, filesize, digest)
+            if received != filesize:
+                # The sender went away early: keep the previous version and its entry
+                raise ConnectionError(f"upload ended after {received} of {filesize} bytes")
+                
             print(f"[FILE] Received {filename} ({received} bytes) from {username}")
             
-            # Add to available files
-            self.available_files[filename] = {
-                'size': filesize,
-                'uploader': username
-            }
+            with self._store_lock:
+                self._unmap_file(filename)
+                os.replace(partial_path, filepath)
+                partial_path = None
+                if filesize > FILE_TRANSFER_CONFIG['MMAP_MAX_SIZE']:
+                    # Too big to keep mapped: drop its written pages rather than let them
+                    # push other files' working sets out of the cache
+                    with open(filepath, 'rb') as f:
+                        _fadvise(f.fileno(), 'POSIX_FADV_DONTNEED')
+                self._map_file(filename)
+                
+                # Add to available files
+                with self._file_list_lock:
+                    self.available_files[filename] = {
+                        'size': filesize,
+                        'uploader': username,
+                        'sha256': digest.hexdigest()
+                    }
+                    self._file_list_frame = None
             
             # Send success response
             response = {'status': 'success', 'message': 'File uploaded successfully'}
-            client_socket.send(json.dumps(response).encode('utf-8'))
+            client_socket.send(_dumps(response))
             
-            # Broadcast file list update to all connected clients
-            print(f"[FILE] Broadcasting file list update to {len(self.clients)} clients")
-            self._broadcast_file_list()
+            # Let the broadcaster push the new list once the upload burst settles
+            self._broadcast_pending.set()
             
         except Exception as e:
             print(f"[FILE] Error in upload: {e}")
+            if partial_path is not None:
+                # Never leave a truncated or half-written upload behind
+                try:
+                    os.remove(partial_path)
+                except OSError:
+                    pass
             response = {'status': 'error', 'message': str(e)}
             try:
-                client_socket.send(json.dumps(response).encode('utf-8'))
+                client_socket.send(_dumps(response))
             except:
                 pass
                 
+    def _receive_buffered(self, client_socket, partial_path, filesize, digest):
+        """Stream an upload into a file through the page cache; returns bytes received"""
+        received = 0
+        # One buffer per upload: recv_into fills it in place and the file
+        # writes straight from a view, so no bytes object is made per chunk
+        buffer = memoryview(bytearray(min(UPLOAD_BUFFER_SIZE, max(filesize, 1))))
+        with open(partial_path, 'wb') as f:
+            _fadvise(f.fileno(), 'POSIX_FADV_SEQUENTIAL')
+            while received < filesize:
+                count = client_socket.recv_into(buffer, min(len(buffer), filesize - received))
+                if not count:
+                    break
+                f.write(buffer[:count])
+                digest.update(buffer[:count])
+                received += count
+        return received
+        
+    def _receive_direct(self, client_socket, partial_path, filesize, digest):
+        """Stream a large upload with O_DIRECT so it bypasses the page cache.
+        
+        Returns bytes received, or None if the platform or filesystem refuses O_DIRECT.
+        """
+        if not hasattr(os, 'O_DIRECT'):
+            return None
+        try:
+            fd = os.open(partial_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+        except OSError:
+            return None
+            
+        # Anonymous mappings are page aligned, as O_DIRECT requires of the source buffer
+        buffer = mmap.mmap(-1, DIRECT_IO_BUFFER_SIZE)
+        view = memoryview(buffer)
+        received = 0
+        filled = 0
+        try:
+            try:
+                while received < filesize:
+                    count = client_socket.recv_into(view[filled:], min(len(view) - filled, filesize - received))
+                    if not count:
+                        break
+                    digest.update(view[filled:filled + count])
+                    filled += count
+                    received += count
+                    if filled == len(view):
+                        _write_all(fd, view)
+                        filled = 0
+                        
+                # Flush the block-aligned part of the remainder directly
+                aligned = filled - filled % DIRECT_IO_ALIGNMENT
+                if aligned:
+                    _write_all(fd, view[:aligned])
+            finally:
+                os.close(fd)
+                
+            # The unaligned tail cannot go through O_DIRECT; append it normally
+            if aligned < filled:
+                with open(partial_path, 'ab') as f:
+                    f.write(view[aligned:filled])
+        finally:
+            view.release()
+            buffer.close()
+        return received
+        
     def _handle_download(self, client_socket, request):
         """Send file to client"""
         try:
@@ -172,81 +491,135 @@ class FileServer:
             
             if not os.path.exists(filepath):
                 response = {'status': 'error', 'message': 'File not found'}
-                client_socket.send(json.dumps(response).encode('utf-8'))
+                client_socket.send(_dumps(response))
                 return
                 
-            filesize = os.path.getsize(filepath)
-            
-            # Send file metadata
-            response = {
-                'status': 'ready',
-                'filesize': filesize
-            }
-            client_socket.send(json.dumps(response).encode('utf-8'))
-            
-            # Wait for client ready signal
-            client_socket.recv(1024)
-            
-            # Send file data
-            with open(filepath, 'rb') as f:
-                sent = 0
-                while sent < filesize:
-                    chunk = f.read(FILE_TRANSFER_CONFIG['CHUNK_SIZE'])
-                    if not chunk:
-                        break
-                    client_socket.send(chunk)
-                    sent += len(chunk)
+            view = self._mapped_view(filename)
+            try:
+                filesize = len(view) if view is not None else os.path.getsize(filepath)
+                
+                # Send file metadata
+                response = {
+                    'status': 'ready',
+                    'filesize': filesize
+                }
+                client_socket.send(_dumps(response))
+                
+                # Wait for client ready signal
+                client_socket.recv(1024)
+                
+                self._set_cork(client_socket, True)
+                if view is not None:
+                    # Hot file: stream straight from the page cache through the mapping
+                    client_socket.sendall(view)
+                    sent = filesize
+                else:
+                    # Send file data; socket.sendfile uses os.sendfile when the platform
+                    # has it and a buffered readinto loop otherwise
+                    sent = 0
+                    if filesize:
+                        with open(filepath, 'rb') as f:
+                            _fadvise(f.fileno(), 'POSIX_FADV_SEQUENTIAL')
+                            sent = client_socket.sendfile(f, 0, filesize)
+            finally:
+                self._set_cork(client_socket, False)
+                if view is not None:
+                    view.release()
                     
             print(f"[FILE] Sent {filename} ({sent} bytes)")
             
         except Exception as e:
             print(f"[FILE] Error in download: {e}")
             
+    def _get_file_list_frame(self):
+        """Return the file list as (length header, payload), serializing it only after the catalogue changes"""
+        with self._file_list_lock:
+            if self._file_list_frame is None:
+                # One payload serves both LIST replies ('status') and pushed updates ('type')
+                message = {
+                    'type': 'file_list_update',
+                    'status': 'success',
+                    'files': self.available_files
+                }
+                data = _dumps(message)
+                self._file_list_frame = (FRAME_HEADER.pack(len(data)), data)
+            return self._file_list_frame
+            
     def _send_file_list(self, client_socket):
         """Send list of available files to client"""
         try:
-            response = {
-                'status': 'success',
-                'files': self.available_files
-            }
-            data = json.dumps(response).encode('utf-8')
-            # Add length header
-            data_with_length = len(data).to_bytes(4, 'big') + data
-            client_socket.send(data_with_length)
+            _send_buffers(client_socket, self._get_file_list_frame())
             print(f"[FILE] Sent file list to client: {list(self.available_files.keys())}")
         except Exception as e:
             print(f"[FILE] Error sending file list: {e}")
             
+    def _broadcast_loop(self, pending):
+        """Coalesce file list changes so a burst of uploads produces one broadcast"""
+        while self.running and self._broadcast_pending is pending:
+            if not pending.wait(timeout=1.0):
+                continue
+            time.sleep(BROADCAST_DEBOUNCE)
+            pending.clear()
+            if self.running:
+                self._broadcast_file_list()
+                
+    def _fill_checksums(self):
+        """Hash the files loaded at startup, then broadcast the list with their checksums"""
+        with self._file_list_lock:
+            missing = [(name, entry) for name, entry in self.available_files.items() if entry['sha256'] is None]
+        for filename, entry in missing:
+            try:
+                digest = _file_sha256(os.path.join(self.storage_path, filename))
+            except OSError as e:
+                print(f"[FILE] Could not checksum {filename}: {e}")
+                continue
+            with self._file_list_lock:
+                # A re-upload replaces the entry, leaving this stale one unreferenced
+                if self.available_files.get(filename) is entry:
+                    entry['sha256'] = digest
+                    self._file_list_frame = None
+        if missing and self.running:
+            self._broadcast_pending.set()
+                
     def _broadcast_file_list(self):
         """Broadcast updated file list to all clients"""
-        message = {
-            'type': 'file_list_update',
-            'files': self.available_files
-        }
-        data = json.dumps(message).encode('utf-8')
+        frame = self._get_file_list_frame()
         
-        print(f"[FILE] Broadcasting file list: {list(self.available_files.keys())}")
+        print(f"[FILE] Broadcasting file list to {len(self.clients)} clients: {list(self.available_files.keys())}")
         
         disconnected = []
-        for client_socket in self.clients:
-            try:
-                # Add length header to help with parsing
-                data_with_length = len(data).to_bytes(4, 'big') + data
-                client_socket.send(data_with_length)
-            except Exception as e:
-                print(f"[FILE] Error broadcasting to client: {e}")
-                disconnected.append(client_socket)
+        for client_socket, state in list(self.clients.items()):
+            with state['lock']:
+                if state['busy']:
+                    continue  # Transfer connection; the client's update connection gets the list
+                try:
+                    _send_buffers(client_socket, frame)
+                except Exception as e:
+                    print(f"[FILE] Error broadcasting to client: {e}")
+                    disconnected.append(client_socket)
                 
         # Clean up disconnected clients
         for client_socket in disconnected:
-            if client_socket in self.clients:
-                self.clients.remove(client_socket)
+            self.clients.pop(client_socket, None)
                 
     def stop(self):
         """Stop the file transfer server"""
         self.running = False
         if self.server_socket:
             self.server_socket.close()
-        for client_socket in self.clients:
+        # Workers are not daemon threads, so wake any blocked in recv or send on a
+        # transfer socket before shutting the pool down; otherwise exit waits for them.
+        # Queued work still runs, but fails at once on the shut-down sockets
+        for client_socket in list(self.clients):
+            try:
+                client_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._pool:
+            self._pool.shutdown(wait=False)
+        for client_socket in list(self.clients):
             client_socket.close()
+        self.clients.clear()
+        for filename in list(self._mappings):
+            self._unmap_file(filename)
         print("[FILE] Server stopped")
\ No newline at end of file
@@ -10,9 +10,26 @@ Task summary:
 import socket
 import threading
 import json
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from constants import HOST, PORTS
+from constants import HOST, PORTS, CONNECTION_CONFIG
+from json_codec import dumps as _dumps, loads as _loads
+
+
+class Participant:
+    """Roster entry for one connected user"""
+    # Explicit __slots__ rather than dataclass(slots=True), which needs Python 3.10+
+    __slots__ = ('status', 'joined_at', 'video_active')
+    
+    def __init__(self, status='online', joined_at='', video_active=False):
+        self.status = status
+        self.joined_at = joined_at
+        self.video_active = video_active
+        
+    def to_dict(self):
+        """Wire form used in participant_list messages"""
+        return {'status': self.status, 'joined_at': self.joined_at, 'video_active': self.video_active}
+
 
 class ParticipantServer:
     def __init__(self, host=HOST):
@@ -20,9 +37,14 @@ class ParticipantServer:
         self.port = PORTS['PARTICIPANTS']
         self.server_socket = None
         self.clients = {}  # {socket: username}
-        self.participants = {}  # {username: {'status': 'online', 'joined_at': timestamp, 'video_active': False}}
+        self.participants = {}  # {username: Participant}
         self.running = False
         self.lock = threading.Lock()
+        self._participant_frame = None  # Serialized participant_list message, rebuilt when dirty
+        self._dirty = True
+        self._broadcast_pending = None  # Set when the roster changed and clients need the update
+        self._pool = None  # One worker per connected participant
+        self._slots = None  # Free worker count; new connections are refused at zero
         
     def start(self):
         """Start the participant server"""
@@ -32,9 +54,21 @@ class ParticipantServer:
             self.server_socket.bind((self.host, self.port))
             self.server_socket.listen(10)
             self.running = True
+            max_participants = CONNECTION_CONFIG['MAX_PARTICIPANTS']
+            self._pool = ThreadPoolExecutor(max_workers=max_participants, thread_name_prefix='participant')
+            self._slots = threading.BoundedSemaphore(max_participants)
             
             print(f"[ParticipantServer] Started on {self.host}:{self.port}")
             
+            # A single broadcaster sends roster updates, so handlers never block on fan-out
+            self._broadcast_pending = threading.Event()
+            broadcast_thread = threading.Thread(
+                target=self._broadcast_loop,
+                args=(self._broadcast_pending,),
+                daemon=True
+            )
+            broadcast_thread.start()
+            
             # Accept clients
             accept_thread = threading.Thread(target=self._accept_clients, daemon=True)
             accept_thread.start()
@@ -50,6 +84,13 @@ class ParticipantServer:
         while self.running:
             try:
                 client_socket, address = self.server_socket.accept()
+                
+                # Handlers live as long as the connection, so queueing would stall the join
+                if not self._slots.acquire(blocking=False):
+                    print(f"[ParticipantServer] Server full, rejecting {address}")
+                    client_socket.close()
+                    continue
+                    
                 client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
                 client_socket.settimeout(30)  # 30 second timeout
                 
@@ -58,42 +99,34 @@ class ParticipantServer:
                 
                 with self.lock:
                     self.clients[client_socket] = username
-                    self.participants[username] = {
-                        'status': 'online',
-                        'joined_at': datetime.now().strftime('%H:%M:%S'),
-                        'video_active': False
-                    }
+                    self.participants[username] = Participant(
+                        joined_at=datetime.now().strftime('%H:%M:%S')
+                    )
+                    self._dirty = True
                 
                 print(f"[ParticipantServer] ✓ {username} joined from {address}")
                 
-                # Small delay to ensure socket is ready
-                time.sleep(0.1)
+                # Hand the connection to a pooled handler and wait until it is listening
+                ready = threading.Event()
+                self._pool.submit(self._handle_client, username, client_socket, ready)
+                ready.wait(timeout=1.0)
                 
                 # Send current participant list to new client IMMEDIATELY
                 self._send_participant_list(client_socket)
                 
-                # Small delay before broadcasting
-                time.sleep(0.1)
-                
                 # Broadcast updated list to all clients (including new one)
                 self._broadcast_participant_update()
                 
-                # Start handler thread for this client
-                handler = threading.Thread(
-                    target=self._handle_client,
-                    args=(username, client_socket),
-                    daemon=True
-                )
-                handler.start()
-                
             except Exception as e:
                 if self.running:
                     print(f"[ParticipantServer] Accept error: {e}")
                 break
                 
-    def _handle_client(self, username, client_socket):
+    def _handle_client(self, username, client_socket, ready):
         """Handle client connection (mainly for keepalive and status updates)"""
+        slots = self._slots  # The slot belongs to this run even if the server restarts
         try:
+            ready.set()
             while self.running:
                 try:
                     data = client_socket.recv(4096)
@@ -106,19 +139,21 @@ class ParticipantServer:
                     
                 # Handle status updates
                 try:
-                    message = json.loads(data.decode('utf-8'))
+                    message = _loads(data)
                     
                     if message.get('type') == 'status_update':
                         with self.lock:
                             if username in self.participants:
-                                self.participants[username]['status'] = message.get('status', 'online')
-                                self._broadcast_participant_update()
+                                self.participants[username].status = message.get('status', 'online')
+                                self._dirty = True
+                        self._broadcast_participant_update()
                     
                     elif message.get('type') == 'video_status':
                         # Update video active status
                         with self.lock:
                             if username in self.participants:
-                                self.participants[username]['video_active'] = message.get('active', False)
+                                self.participants[username].video_active = message.get('active', False)
+                                self._dirty = True
                                 print(f"[ParticipantServer] {username} video status: {message.get('active', False)}")
                         # Broadcast OUTSIDE the lock to avoid deadlock
                         self._broadcast_participant_update()
@@ -126,7 +161,7 @@ class ParticipantServer:
                     elif message.get('type') == 'keepalive':
                         # Respond to keepalive
                         try:
-                            response = json.dumps({'type': 'keepalive_ack'}).encode('utf-8') + b'\n'
+                            response = _dumps({'type': 'keepalive_ack'}) + b'\n'
                             client_socket.sendall(response)
                         except:
                             print(f"[ParticipantServer] Failed to send keepalive ack to {username}")
@@ -145,35 +180,55 @@ class ParticipantServer:
             # CRITICAL: Always remove and broadcast
             print(f"[ParticipantServer] Cleaning up {username}...")
             self._remove_participant(username, client_socket)
+            slots.release()
+            
+    def _get_participant_frame(self):
+        """Return the serialized participant list, re-encoding only after a change (call with lock held)"""
+        if self._dirty or self._participant_frame is None:
+            message = {
+                'type': 'participant_list',
+                'participants': {
+                    username: participant.to_dict()
+                    for username, participant in self.participants.items()
+                }
+            }
+            self._participant_frame = _dumps(message) + b'\n'
+            self._dirty = False
+        return self._participant_frame
             
     def _send_participant_list(self, client_socket):
         """Send current participant list to a specific client"""
         try:
             with self.lock:
-                message = {
-                    'type': 'participant_list',
-                    'participants': self.participants.copy()
-                }
+                data = self._get_participant_frame()
+                count = len(self.participants)
             
-            data = json.dumps(message).encode('utf-8')
-            client_socket.sendall(data + b'\n')
-            print(f"[ParticipantServer] Sent participant list to client: {len(self.participants)} participants")
+            client_socket.sendall(data)
+            print(f"[ParticipantServer] Sent participant list to client: {count} participants")
             
         except Exception as e:
             print(f"[ParticipantServer] Error sending list: {e}")
             
     def _broadcast_participant_update(self):
+        """Schedule a participant list broadcast; changes made meanwhile share it"""
+        self._broadcast_pending.set()
+        
+    def _broadcast_loop(self, pending):
+        """Send the latest participant list whenever a broadcast has been scheduled"""
+        while self.running and self._broadcast_pending is pending:
+            if not pending.wait(timeout=1.0):
+                continue
+            pending.clear()
+            if self.running:
+                self._send_participant_update()
+                
+    def _send_participant_update(self):
         """Broadcast updated participant list to all clients"""
         # Get data while holding lock
         with self.lock:
-            message = {
-                'type': 'participant_list',
-                'participants': self.participants.copy()
-            }
+            data = self._get_participant_frame()
             participant_names = list(self.participants.keys())
             clients_to_notify = list(self.clients.items())
-            
-        data = json.dumps(message).encode('utf-8') + b'\n'
         
         print(f"[ParticipantServer] 📢 Broadcasting to {len(clients_to_notify)} clients: {participant_names}")
         
@@ -197,6 +252,7 @@ class ParticipantServer:
                         del self.clients[client_socket]
                     if username in self.participants:
                         del self.participants[username]
+                        self._dirty = True
                     try:
                         client_socket.close()
                     except:
@@ -214,6 +270,7 @@ class ParticipantServer:
                 
             if username in self.participants:
                 del self.participants[username]
+                self._dirty = True
                 remaining = list(self.participants.keys())
                 print(f"[ParticipantServer] ❌ {username} removed (Remaining: {remaining})")
                 removed = True
@@ -227,15 +284,19 @@ class ParticipantServer:
         # CRITICAL: Broadcast if someone was removed
         if removed:
             print(f"[ParticipantServer]  Broadcasting removal of {username}")
-            time.sleep(0.1)  # Small delay to ensure cleanup
             self._broadcast_participant_update()
         
     def stop(self):
         """Stop the participant server"""
         self.running = False
         
-        # Close all client connections
+        # Close all client connections; shutdown() wakes the pooled handlers blocked
+        # in recv, which are not daemon threads and would otherwise hold up exit
         for client_socket in list(self.clients.keys()):
+            try:
+                client_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
             try:
                 client_socket.close()
             except:
@@ -243,6 +304,10 @@ class ParticipantServer:
                 
         self.clients.clear()
         self.participants.clear()
+        self._dirty = True
+        
+        if self._pool:
+            self._pool.shutdown(wait=False)
         
         # Close server socket
         if self.server_socket:
@@ -9,21 +9,41 @@ Task summary:
 
 import socket
 import threading
-import pickle
-import struct
-from constants import HOST, PORTS, BUFFER_SIZE
+import selectors
+from collections import deque
+from constants import HOST, PORTS, SCREEN_SHARE_CONFIG
+from screen_protocol import (
+    MSG_SCREEN_FRAME, FRAME_HEADER, HDR,
+    encode_control as _encode_control, decode_control as _decode_control
+)
+
+
+# (level, option, value) applied to the listening socket and every accepted client
+DEFAULT_SOCKET_OPTIONS = (
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),  # Frames leave at once instead of waiting on Nagle
+    (socket.SOL_SOCKET, socket.SO_SNDBUF, SCREEN_SHARE_CONFIG['SEND_BUFFER_SIZE']),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+)
+
+# Buffers handed to one sendmsg() call when flushing a client's outbox
+MAX_SEND_BUFFERS = 64
+
 
 class ScreenServer:
-    def __init__(self, host=HOST):
+    def __init__(self, host=HOST, socket_options=None):
         self.host = host
         self.port = PORTS['SCREEN_SHARE']
+        self.socket_options = DEFAULT_SOCKET_OPTIONS if socket_options is None else tuple(socket_options)
         self.server_socket = None
+        self._selector = None
         self.clients = {}  # {username: socket}
-        self.client_threads = {}
+        self.client_states = {}  # {username: connection state registered with the selector}
+        self._broadcast_rotation = 0  # Index of the viewer the next frame is written to first
         self.running = False
         
         # Screen sharing control (ONLY ONE PRESENTER)
         self.current_presenter = None  # Username of current presenter
+        self._presenter_name = None  # Presenter's UTF-8 username, stamped on every relayed frame
         self.presenter_lock = threading.Lock()
         
     def start(self):
@@ -31,15 +51,19 @@ class ScreenServer:
         try:
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            # Set before listen() so platforms that inherit options apply them from the start
+            self._apply_socket_options(self.server_socket)
             self.server_socket.bind((self.host, self.port))
             self.server_socket.listen(10)
             self.running = True
             
             print(f"[ScreenServer] Started on {self.host}:{self.port}")
             
-            # Accept clients
-            accept_thread = threading.Thread(target=self._accept_clients, daemon=True)
-            accept_thread.start()
+            # One event loop serves every client: reads, relaying and non-blocking writes
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self.server_socket, selectors.EVENT_READ)
+            loop_thread = threading.Thread(target=self._event_loop, args=(self._selector,), daemon=True)
+            loop_thread.start()
             
             return True
             
@@ -47,94 +71,185 @@ class ScreenServer:
             print(f"[ScreenServer] Failed to start: {e}")
             return False
             
-    def _accept_clients(self):
-        """Accept incoming client connections"""
-        while self.running:
+    def _event_loop(self, selector):
+        """Dispatch readiness events for the listening socket and every client connection"""
+        # A restart installs a new selector; the previous loop then winds down
+        while self.running and self._selector is selector:
             try:
-                client_socket, address = self.server_socket.accept()
-                
-                # Receive username
-                username = client_socket.recv(1024).decode('utf-8')
-                
-                self.clients[username] = client_socket
-                print(f"[ScreenServer] {username} connected from {address}")
-                
-                # Send current presenter info if someone is presenting
-                with self.presenter_lock:
-                    if self.current_presenter:
-                        self._send_to_client(username, {
-                            'type': 'presenter_started',
-                            'username': self.current_presenter
-                        })
-                
-                # Start handler thread for this client
-                handler = threading.Thread(
-                    target=self._handle_client,
-                    args=(username, client_socket),
-                    daemon=True
-                )
-                self.client_threads[username] = handler
-                handler.start()
-                
-            except Exception as e:
-                if self.running:
-                    print(f"[ScreenServer] Accept error: {e}")
+                events = selector.select(timeout=1.0)
+            except (OSError, ValueError):
                 break
-                
-    def _handle_client(self, username, client_socket):
-        """Handle screen share from a client"""
-        data = b""
-        payload_size = struct.calcsize("L")
+            for key, mask in events:
+                if key.fileobj is self.server_socket:
+                    self._accept_client()
+                    continue
+                state = key.data
+                try:
+                    if mask & selectors.EVENT_WRITE:
+                        self._flush(key.fileobj, state)
+                    if mask & selectors.EVENT_READ and not state['closed']:
+                        self._read_client(key.fileobj, state)
+                except (BlockingIOError, InterruptedError):
+                    pass
+                except Exception as e:
+                    print(f"[ScreenServer] Error with {key.data['username']}: {e}")
+                    self._disconnect(key.fileobj, key.data)
+        selector.close()
         
-        while self.running:
-            try:
-                # Receive message size
-                while len(data) < payload_size:
-                    packet = client_socket.recv(BUFFER_SIZE)
-                    if not packet:
-                        break
-                    data += packet
-                    
-                if len(data) < payload_size:
-                    break
-                    
-                packed_msg_size = data[:payload_size]
-                data = data[payload_size:]
-                msg_size = struct.unpack("L", packed_msg_size)[0]
-                
-                # Receive frame data
-                while len(data) < msg_size:
-                    data += client_socket.recv(BUFFER_SIZE)
-                    
-                frame_data = data[:msg_size]
-                data = data[msg_size:]
+    def _accept_client(self):
+        """Accept an incoming connection and watch it for its username"""
+        try:
+            client_socket, address = self.server_socket.accept()
+        except OSError as e:
+            if self.running:
+                print(f"[ScreenServer] Accept error: {e}")
+            return
+        self._apply_socket_options(client_socket)
+        client_socket.setblocking(False)
+        state = {
+            'username': None,
+            'address': address,
+            'buffer': None,  # Receive buffer, allocated once the username has arrived
+            'view': None,
+            'head': 0,  # Start of the first unparsed message in buffer
+            'tail': 0,  # End of the received bytes in buffer
+            'outbox': deque(),  # Buffer lists not yet written; the head may be partly sent
+            'frames': deque(maxlen=SCREEN_SHARE_CONFIG['MAX_QUEUED_FRAMES']),  # Newest frames waiting
+            'dropped_frames': 0,
+            'events': selectors.EVENT_READ,
+            'closed': False
+        }
+        self._selector.register(client_socket, selectors.EVENT_READ, state)
+        
+    def _register_client(self, username, client_socket, state):
+        """Start serving a client once its username has arrived"""
+        previous = self.client_states.get(username)
+        if previous is not None:
+            # The old connection stays open until it ends, but gets no more messages
+            previous['outbox'].clear()
+            previous['frames'].clear()
+        self.clients[username] = client_socket
+        self.client_states[username] = state
+        print(f"[ScreenServer] {username} connected from {state['address']}")
+        
+        # Send current presenter info if someone is presenting
+        with self.presenter_lock:
+            if self.current_presenter:
+                self._send_to_client(username, {
+                    'type': 'presenter_started',
+                    'username': self.current_presenter
+                })
                 
-                # Unpack message
-                message = pickle.loads(frame_data)
+    def _apply_socket_options(self, sock):
+        """Apply the configured socket options, skipping any the platform rejects"""
+        for level, option, value in self.socket_options:
+            try:
+                sock.setsockopt(level, option, value)
+            except OSError as e:
+                print(f"[ScreenServer] Could not set socket option {option}: {e}")
                 
-                # Handle different message types
-                if message['type'] == 'start_presenting':
-                    self._handle_start_presenting(username)
-                elif message['type'] == 'stop_presenting':
-                    self._handle_stop_presenting(username)
-                elif message['type'] == 'screen_frame':
-                    # Only broadcast if this user is the current presenter
-                    with self.presenter_lock:
-                        if self.current_presenter == username:
-                            frame_info = {
-                                'type': 'screen_frame',
-                                'username': username,
-                                'frame': message['frame']
-                            }
-                            self._broadcast_to_all_except(username, frame_info)
+    def _read_client(self, client_socket, state):
+        """Read what a readable client sent and dispatch every complete message"""
+        if state['username'] is None:
+            # The first packet from a client is its bare username
+            data = client_socket.recv(1024)
+            if not data:
+                self._disconnect(client_socket, state)
+                return
+            state['username'] = data.decode('utf-8')
+            state['buffer'] = bytearray(SCREEN_SHARE_CONFIG['RECV_BUFFER_SIZE'])
+            state['view'] = memoryview(state['buffer'])
+            self._register_client(state['username'], client_socket, state)
+            return
+            
+        buffer, view = state['buffer'], state['view']
+        head, tail = state['head'], state['tail']
+        if tail == len(buffer):
+            if head:
+                # Move the partial message to the front instead of reallocating
+                buffer[:tail - head] = view[head:tail]
+                tail -= head
+                head = 0
+            else:
+                # One message larger than the buffer: double it
+                grown = bytearray(2 * len(buffer))
+                grown[:tail] = view[:tail]
+                buffer, view = grown, memoryview(grown)
+                state['buffer'], state['view'] = buffer, view
                 
-            except Exception as e:
-                print(f"[ScreenServer] Error with {username}: {e}")
+        received = client_socket.recv_into(view[tail:])
+        if not received:
+            self._disconnect(client_socket, state)
+            return
+        tail += received
+        
+        username = state['username']
+        while tail - head >= HDR.size:
+            msg_size, = HDR.unpack_from(buffer, head)
+            end = head + HDR.size + msg_size
+            if end > tail:
                 break
+            body = view[head + HDR.size:end]
+            head = end
+            state['head'] = head
+            
+            # Screen frames are relayed as raw bytes; they get
+            # their own copy since viewer outboxes outlive this buffer's contents
+            if body and body[0] == MSG_SCREEN_FRAME:
+                self._relay_frame(username, bytes(body))
+                continue
+                
+            # Unpack control message
+            message = _decode_control(body)
+            
+            # Handle different message types
+            if message['type'] == 'start_presenting':
+                self._handle_start_presenting(username)
+            elif message['type'] == 'stop_presenting':
+                self._handle_stop_presenting(username)
                 
-        # Client disconnected
-        self._handle_stop_presenting(username)
-        self._remove_client(username)
+        if head == tail:
+            head = tail = 0
+        state['head'], state['tail'] = head, tail
+        
+    def _disconnect(self, client_socket, state):
+        """Clean up after a client whose connection ended"""
+        state['closed'] = True
+        try:
+            self._selector.unregister(client_socket)
+        except (KeyError, ValueError):
+            pass
+        username = state['username']
+        # A reconnect under the same name replaces the socket; leave the new session alone
+        if username is not None and self.clients.get(username) is client_socket:
+            self._handle_stop_presenting(username)
+            self._remove_client(username)
+        else:
+            client_socket.close()
+            
+    def _relay_frame(self, username, frame_data):
+        """Forward a binary screen frame to every viewer, stamped with the presenter's name"""
+        # Presenter changes happen on this same event loop thread, so a plain read
+        # is enough here and frames never wait on presenter_lock
+        if self.current_presenter != username:
+            return
+        name = self._presenter_name
+        
+        _, name_length, frame_length = FRAME_HEADER.unpack_from(frame_data)
+        start = FRAME_HEADER.size + name_length
+        if frame_data[FRAME_HEADER.size:start] == name and len(frame_data) == start + frame_length:
+            # Already stamped by the presenter: forward the message as it came in
+            self._broadcast_to_all_except(username, HDR.pack(len(frame_data)), frame_data)
+            return
+            
+        frame = memoryview(frame_data)[start:start + frame_length]
+        # Outer size prefix, frame header and name go out as one small buffer
+        header = b''.join((
+            HDR.pack(FRAME_HEADER.size + len(name) + len(frame)),
+            FRAME_HEADER.pack(MSG_SCREEN_FRAME, len(name), len(frame)),
+            name
+        ))
+        self._broadcast_to_all_except(username, header, frame)
         
     def _handle_start_presenting(self, username):
         """Handle request to start presenting"""
@@ -142,6 +257,7 @@ class ScreenServer:
             if self.current_presenter is None:
                 # No one is presenting, allow this user
                 self.current_presenter = username
+                self._presenter_name = username.encode('utf-8')
                 print(f"[ScreenServer] {username} started presenting")
                 
                 # Notify all clients that someone started presenting
@@ -172,6 +288,7 @@ class ScreenServer:
         with self.presenter_lock:
             if self.current_presenter == username:
                 self.current_presenter = None
+                self._presenter_name = None
                 print(f"[ScreenServer] {username} stopped presenting")
                 
                 # Notify all clients that presenter stopped
@@ -183,63 +300,135 @@ class ScreenServer:
                 
     def _broadcast_to_all(self, message):
         """Broadcast message to ALL clients"""
-        data = pickle.dumps(message)
-        message_size = struct.pack("L", len(data))
-        full_message = message_size + data
-        
-        disconnected = []
-        for username, client_socket in list(self.clients.items()):
-            try:
-                client_socket.sendall(full_message)
-            except Exception as e:
-                print(f"[ScreenServer] Failed to send to {username}: {e}")
-                disconnected.append(username)
+        data = _encode_control(message)
         
-        for username in disconnected:
-            self._remove_client(username)
+        for username in list(self.clients):
+            self._queue_message(username, [data])
     
-    def _broadcast_to_all_except(self, sender_username, message):
-        """Broadcast message to all clients except sender"""
-        data = pickle.dumps(message)
-        message_size = struct.pack("L", len(data))
-        full_message = message_size + data
-        
-        disconnected = []
-        for username, client_socket in list(self.clients.items()):
-            if username != sender_username:
-                try:
-                    client_socket.sendall(full_message)
-                except Exception as e:
-                    print(f"[ScreenServer] Failed to send to {username}: {e}")
-                    disconnected.append(username)
-        
-        for username in disconnected:
-            self._remove_client(username)
+    def _broadcast_to_all_except(self, sender_username, header, frame):
+        """Broadcast a screen frame (framed header + raw image bytes) to all clients except sender"""
+        viewers = [username for username in self.clients if username != sender_username]
+        if not viewers:
+            return
+        # Start each frame at a different viewer so none is always written last
+        self._broadcast_rotation = (self._broadcast_rotation + 1) % len(viewers)
+        rotation = self._broadcast_rotation
+        # Every viewer's queue shares the same header and frame buffers
+        for username in viewers[rotation:] + viewers[:rotation]:
+            self._queue_frame(username, [header, frame])
     
     def _send_to_client(self, username, message):
         """Send message to specific client"""
         if username in self.clients:
-            try:
-                data = pickle.dumps(message)
-                message_size = struct.pack("L", len(data))
-                self.clients[username].sendall(message_size + data)
-            except Exception as e:
-                print(f"[ScreenServer] Failed to send to {username}: {e}")
-                self._remove_client(username)
-                
+            self._queue_message(username, [_encode_control(message)])
+            
+    def _queue_message(self, username, buffers):
+        """Queue a control message for a client; these are never dropped"""
+        state = self.client_states.get(username)
+        if state is None:
+            return
+        backlog = len(state['outbox'])
+        if backlog >= SCREEN_SHARE_CONFIG['MAX_QUEUED_MESSAGES']:
+            print(f"[ScreenServer] {username} is too slow ({backlog} messages queued), disconnecting")
+            self._abort_client(self.clients[username], state)
+            return
+        self._enqueue(username, state, state['outbox'], buffers)
+        
+    def _queue_frame(self, username, buffers):
+        """Queue a screen frame for a viewer, dropping its oldest waiting frame when full"""
+        state = self.client_states.get(username)
+        if state is None:
+            return
+        frames = state['frames']
+        if len(frames) == frames.maxlen:
+            # The deque discards the oldest frame on append; a later frame supersedes it
+            state['dropped_frames'] += 1
+            if state['dropped_frames'] % 100 == 1:
+                print(f"[ScreenServer] {username} is falling behind, {state['dropped_frames']} frames dropped")
+        self._enqueue(username, state, frames, buffers)
+        
+    def _enqueue(self, username, state, queue, buffers):
+        """Append buffers to one of a client's queues and write right away if it was idle"""
+        views = [view for view in (memoryview(buf).cast('B') for buf in buffers) if view.nbytes]
+        if not views:
+            return
+        idle = not state['outbox'] and not state['frames']
+        queue.append(views)
+        # Otherwise the socket is already waiting for EVENT_WRITE
+        if idle:
+            self._flush(self.clients[username], state)
+            
+    def _flush(self, client_socket, state):
+        """Write queued buffers until the queues drain or the socket buffer fills"""
+        outbox = state['outbox']
+        frames = state['frames']
+        try:
+            while outbox or frames:
+                if not outbox:
+                    # Frames wait in their own queue until they are the next thing to send,
+                    # so only whole, unsent frames are ever dropped
+                    outbox.append(frames.popleft())
+                if hasattr(client_socket, 'sendmsg'):
+                    views = [view for message in outbox for view in message][:MAX_SEND_BUFFERS]
+                    sent = client_socket.sendmsg(views)
+                else:
+                    sent = client_socket.send(outbox[0][0])
+                # Drop fully written buffers and trim the partially written one
+                while sent:
+                    message = outbox[0]
+                    if sent < message[0].nbytes:
+                        message[0] = message[0][sent:]
+                        break
+                    sent -= message.pop(0).nbytes
+                    if not message:
+                        outbox.popleft()
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError as e:
+            print(f"[ScreenServer] Failed to send to {state['username']}: {e}")
+            self._abort_client(client_socket, state)
+            
+        # Only ask for EVENT_WRITE while there is something left to send
+        events = selectors.EVENT_READ | selectors.EVENT_WRITE if outbox or frames else selectors.EVENT_READ
+        if events != state['events'] and not state['closed']:
+            state['events'] = events
+            self._selector.modify(client_socket, events, state)
+            
+    def _abort_client(self, client_socket, state):
+        """Stop sending to a client and let the event loop run its normal disconnect"""
+        # Callers may hold presenter_lock, so cleanup is left to the read side: after
+        # shutdown() the socket reads EOF and goes through _disconnect, which also
+        # frees the presenter slot if this client held it
+        username = state['username']
+        if self.client_states.get(username) is state:
+            del self.client_states[username]
+        state['outbox'].clear()
+        state['frames'].clear()
+        try:
+            client_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+            
     def _remove_client(self, username):
         """Remove a disconnected client"""
-        if username in self.clients:
+        state = self.client_states.pop(username, None)
+        if state is not None:
+            state['closed'] = True
+            state['outbox'].clear()
+            state['frames'].clear()
+            
+        client_socket = self.clients.pop(username, None)
+        if client_socket is not None:
             try:
-                self.clients[username].close()
+                self._selector.unregister(client_socket)
+            except (KeyError, ValueError):
+                pass
+            try:
+                client_socket.close()
             except:
                 pass
-            del self.clients[username]
             print(f"[ScreenServer] {username} disconnected")
             
-        if username in self.client_threads:
-            del self.client_threads[username]
-            
     def stop(self):
         """Stop the screen share server"""
         self.running = False
@@ -252,7 +441,7 @@ class ScreenServer:
                 pass
                 
         self.clients.clear()
-        self.client_threads.clear()
+        self.client_states.clear()
         
         # Close server socket
         if self.server_socket:
@@ -7,21 +7,110 @@ Task summary:
 - Periodically clean up stale metadata so the broadcaster loop stays lightweight.
 """
 
+import ctypes
+import ctypes.util
+import errno
+import os
 import socket
+import struct
+import sys
 import threading
 import time
 
 from constants import PORTS, HOST, BUFFER_SIZE
 
 REGISTER_PREFIX = b"REGISTER|"
+# Frame chunks start with b"FRAME|", so the first byte alone routes a datagram
+REGISTER_TAG = REGISTER_PREFIX[0]
 RECV_BUFFER_SIZE = min(BUFFER_SIZE, 16384)
 CLIENT_TIMEOUT = 12
+# Liveness is tracked on a timing wheel of coarse ticks from time.monotonic_ns() >> TICK_SHIFT
+TICK_SHIFT = 30  # ~1.07 s per tick
+WHEEL_SLOTS = 16  # Must exceed TIMEOUT_TICKS so live and expired clients never share a sweep
+TIMEOUT_TICKS = (CLIENT_TIMEOUT * 1_000_000_000 >> TICK_SHIFT) + 1
+SOCKADDR_IN_SIZE = 16  # sizeof(struct sockaddr_in)
+# With fewer peers a plain sendto loop beats a sendmmsg call through ctypes (measured
+# crossover on loopback: about 4 recipients)
+SENDMMSG_MIN_PEERS = 5
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.POINTER(_IOVec)),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _MsgHdr), ('msg_len', ctypes.c_uint)]
+
+
+def _load_sendmmsg():
+    """Return libc's sendmmsg(2) (Linux only), or None so callers fall back to sendto."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        sendmmsg = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    sendmmsg.restype = ctypes.c_int
+    return sendmmsg
+
+
+_sendmmsg = _load_sendmmsg()
+
+
+class _PeerBatch:
+    """sendmmsg(2) arguments prebuilt for one peer snapshot; only the shared iovec changes per packet."""
+
+    def __init__(self, sockaddrs, count):
+        self.names = ctypes.create_string_buffer(sockaddrs, len(sockaddrs))
+        self.iov = _IOVec()
+        self.messages = (_MMsgHdr * count)()
+        names_base = ctypes.addressof(self.names)
+        iov_pointer = ctypes.pointer(self.iov)
+        # Message i goes to peer slot i; every message points at the same iovec
+        for slot, message in enumerate(self.messages):
+            header = message.msg_hdr
+            header.msg_name = names_base + slot * SOCKADDR_IN_SIZE
+            header.msg_namelen = SOCKADDR_IN_SIZE
+            header.msg_iov = iov_pointer
+            header.msg_iovlen = 1
+        self.base = ctypes.addressof(self.messages)
+
+
+def _sockaddr_in(address):
+    """Pack an (ip, port) tuple as a struct sockaddr_in."""
+    host, port = address
+    return struct.pack('=H', socket.AF_INET) + struct.pack('!H', port) + socket.inet_aton(host) + bytes(8)
 
 
 class VideoServer:
     def __init__(self):
         self.clients = {}  # {address: username}
-        self.last_seen = {}
+        self._last_tick = {}  # {address: tick of the latest packet}
+        self._wheel = [set() for _ in range(WHEEL_SLOTS)]  # Addresses grouped by last_tick % WHEEL_SLOTS
+        self._wheel_lock = threading.Lock()
+        # Relay routing table as parallel arrays: slot i holds a peer's address and,
+        # at i * SOCKADDR_IN_SIZE, its packed sockaddr_in ready for sendmmsg
+        self._peer_addrs = []
+        self._peer_sockaddrs = bytearray()
+        self._peer_slots = {}  # {address: slot index}
+        self._peers_lock = threading.Lock()
+        # Immutable (addresses, slots, sendmmsg batch or None) copy for the relay loop,
+        # replaced whenever membership changes so reading it needs no lock
+        self._peer_snapshot = ((), {}, None)
         self.running = False
         self.server_socket = None
 
@@ -40,9 +129,16 @@ class VideoServer:
 
     def _receive_and_broadcast(self):
         """Process registration packets and relay frame chunks to active clients."""
+        # Each datagram is relayed before the next one is read, so a single
+        # preallocated buffer serves every packet without per-packet allocation
+        recv_buffer = bytearray(RECV_BUFFER_SIZE)
+        recv_view = memoryview(recv_buffer)
+        # Fixed C address of the buffer for sendmmsg iovecs; the bytearray never resizes
+        recv_anchor = (ctypes.c_char * RECV_BUFFER_SIZE).from_buffer(recv_buffer)
+        recv_address = ctypes.addressof(recv_anchor)
         while self.running:
             try:
-                data, address = self.server_socket.recvfrom(RECV_BUFFER_SIZE)
+                nbytes, address = self.server_socket.recvfrom_into(recv_view)
             except socket.timeout:
                 continue
             except OSError:
@@ -52,11 +148,12 @@ class VideoServer:
                     print(f"[VIDEO] Error receiving: {exc}")
                 continue
 
-            if not data:
+            if not nbytes:
                 continue
+            data = recv_view[:nbytes]
 
-            if data.startswith(REGISTER_PREFIX):
-                username = data[len(REGISTER_PREFIX):].decode('utf-8', errors='ignore')
+            if data[0] == REGISTER_TAG and data[:len(REGISTER_PREFIX)] == REGISTER_PREFIX:
+                username = bytes(data[len(REGISTER_PREFIX):]).decode('utf-8', errors='ignore')
                 previous = self.clients.get(address)
                 if previous != username:
                     print(f"[VIDEO] Registered video client: {username} from {address}")
@@ -68,37 +165,146 @@ class VideoServer:
                     except Exception:
                         pass
                 self.clients[address] = username
-                self.last_seen[address] = time.time()
+                self._touch(address)
+                self._add_peer(address)
                 continue
 
             if address not in self.clients:
                 continue
 
-            self.last_seen[address] = time.time()
+            self._touch(address)
 
-            disconnected = []
-            for client_address in list(self.clients.keys()):
-                if client_address == address:
-                    continue
-                try:
-                    self.server_socket.sendto(data, client_address)
-                except Exception as exc:
-                    print(f"[VIDEO] Error sending to {client_address}: {exc}")
-                    disconnected.append(client_address)
+            addrs, slots, batch = self._peer_snapshot
+            sender = slots.get(address, -1)
+            disconnected = self._fan_out(data, recv_address, sender, addrs, batch)
 
             for dead in disconnected:
                 self.clients.pop(dead, None)
-                self.last_seen.pop(dead, None)
+                self._forget(dead)
+                self._drop_peer(dead)
+
+    def _add_peer(self, address):
+        """Give a registered client a slot in the relay table."""
+        with self._peers_lock:
+            if address in self._peer_slots:
+                return
+            self._peer_slots[address] = len(self._peer_addrs)
+            self._peer_addrs.append(address)
+            self._peer_sockaddrs += _sockaddr_in(address)
+            self._publish_peers()
+
+    def _drop_peer(self, address):
+        """Free a client's slot, moving the last peer into it to keep the arrays dense."""
+        with self._peers_lock:
+            slot = self._peer_slots.pop(address, None)
+            if slot is None:
+                return
+            last = len(self._peer_addrs) - 1
+            if slot != last:
+                moved = self._peer_addrs[last]
+                self._peer_addrs[slot] = moved
+                self._peer_sockaddrs[slot * SOCKADDR_IN_SIZE:(slot + 1) * SOCKADDR_IN_SIZE] = \
+                    self._peer_sockaddrs[last * SOCKADDR_IN_SIZE:]
+                self._peer_slots[moved] = slot
+            self._peer_addrs.pop()
+            del self._peer_sockaddrs[last * SOCKADDR_IN_SIZE:]
+            self._publish_peers()
+
+    def _publish_peers(self):
+        """Swap in a fresh relay snapshot; called with _peers_lock held."""
+        batch = None
+        if _sendmmsg is not None and len(self._peer_addrs) >= SENDMMSG_MIN_PEERS:
+            batch = _PeerBatch(bytes(self._peer_sockaddrs), len(self._peer_addrs))
+        self._peer_snapshot = (tuple(self._peer_addrs), dict(self._peer_slots), batch)
+
+    def _fan_out(self, data, data_address, sender, addrs, batch):
+        """Send one datagram to every peer but the sender's slot; returns the addresses that failed."""
+        if batch is not None:
+            try:
+                return self._send_batch(data, data_address, sender, addrs, batch)
+            except (OSError, ValueError) as exc:
+                print(f"[VIDEO] sendmmsg unavailable, using sendto: {exc}")
+        return self._fan_out_sendto(data, [slot for slot in range(len(addrs)) if slot != sender], addrs)
+
+    def _fan_out_sendto(self, data, recipients, addrs):
+        """Portable fan-out: one sendto per recipient slot."""
+        disconnected = []
+        for slot in recipients:
+            try:
+                self.server_socket.sendto(data, addrs[slot])
+            except Exception as exc:
+                print(f"[VIDEO] Error sending to {addrs[slot]}: {exc}")
+                disconnected.append(addrs[slot])
+        return disconnected
+
+    def _send_batch(self, data, data_address, sender, addrs, batch):
+        """Hand all copies of a datagram to the kernel with sendmmsg(2), skipping the sender's slot."""
+        batch.iov.iov_base = data_address
+        batch.iov.iov_len = len(data)
+        fd = self.server_socket.fileno()
+        message_size = ctypes.sizeof(_MMsgHdr)
+        disconnected = []
+        # Slots before and after the sender are two contiguous runs of prebuilt messages
+        for start, stop in ((0, sender), (sender + 1, len(addrs))):
+            while start < stop:
+                sent = _sendmmsg(fd, batch.base + start * message_size, stop - start, 0)
+                if sent > 0:
+                    start += sent
+                    continue
+                err = ctypes.get_errno()
+                if err == errno.EINTR:
+                    continue
+                if err in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    # Send buffer full: let sendto wait out the timeout for the rest
+                    rest = [slot for slot in range(start, len(addrs)) if slot != sender]
+                    return disconnected + self._fan_out_sendto(data, rest, addrs)
+                # The first unsent message failed; report it and carry on with the others
+                failed = addrs[start]
+                print(f"[VIDEO] Error sending to {failed}: {os.strerror(err)}")
+                disconnected.append(failed)
+                start += 1
+        return disconnected
+
+    def _touch(self, address):
+        """Mark a client alive; only moves it on the wheel when the tick has advanced."""
+        tick = time.monotonic_ns() >> TICK_SHIFT
+        if self._last_tick.get(address) == tick:
+            return
+        with self._wheel_lock:
+            previous = self._last_tick.get(address)
+            if previous is not None:
+                self._wheel[previous % WHEEL_SLOTS].discard(address)
+            self._wheel[tick % WHEEL_SLOTS].add(address)
+            self._last_tick[address] = tick
+
+    def _forget(self, address):
+        """Take a client off the timing wheel."""
+        with self._wheel_lock:
+            previous = self._last_tick.pop(address, None)
+            if previous is not None:
+                self._wheel[previous % WHEEL_SLOTS].discard(address)
 
     def _cleanup_loop(self):
         """Remove clients that stop sending keepalives to keep routing tables clean."""
+        swept = (time.monotonic_ns() >> TICK_SHIFT) - TIMEOUT_TICKS - 1
         while self.running:
-            time.sleep(3)
-            now = time.time()
-            stale = [addr for addr, last in self.last_seen.items() if now - last > CLIENT_TIMEOUT]
+            time.sleep(1)
+            # Ticks at or before the horizon are older than the timeout; visit each one
+            # once and check only the bucket it maps to
+            horizon = (time.monotonic_ns() >> TICK_SHIFT) - TIMEOUT_TICKS - 1
+            stale = []
+            with self._wheel_lock:
+                while swept < horizon:
+                    swept += 1
+                    bucket = self._wheel[swept % WHEEL_SLOTS]
+                    expired = [addr for addr in bucket if self._last_tick[addr] == swept]
+                    for addr in expired:
+                        bucket.discard(addr)
+                        del self._last_tick[addr]
+                    stale.extend(expired)
             for addr in stale:
                 username = self.clients.pop(addr, None)
-                self.last_seen.pop(addr, None)
+                self._drop_peer(addr)
                 if username:
                     print(f"[VIDEO] Removed stale video client: {username} {addr}")
 
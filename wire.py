@@ -0,0 +1,23 @@
+# wire.py
+"""Socket framing helpers shared by the client and server modules."""
+
+import struct
+
+FILE_FRAME_HEADER = struct.Struct('>I')  # Length prefix of file control requests and file list frames
+
+
+def send_buffers(sock, buffers):
+    """sendall() for a list of buffers, written with sendmsg scatter-gather where available (not on Windows)"""
+    if not hasattr(sock, 'sendmsg'):
+        for buf in buffers:
+            sock.sendall(buf)
+        return
+    views = [memoryview(buf).cast('B') for buf in buffers]
+    while views:
+        sent = sock.sendmsg(views)
+        # Drop fully written buffers and trim the partially written one
+        while views and sent >= len(views[0]):
+            sent -= len(views[0])
+            views.pop(0)
+        if views and sent:
+            views[0] = views[0][sent:]